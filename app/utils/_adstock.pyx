@@ -0,0 +1,34 @@
+# cython: language_level=3
+"""Ahead-of-time compiled adstock recurrence, see `transformations._apply_halflife_batch`."""
+cimport cython
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void adstock_f32(const double[:, ::1] series, double decay, float[:, ::1] out) noexcept:
+    """
+    Evaluate x'_t = x_t + x'_{t-1} * decay along each row into `out`.
+
+    After the first four periods the recurrence is unrolled to
+    x'_t = x_t + d x_{t-1} + d^2 x_{t-2} + d^3 x_{t-3} + d^4 x'_{t-4}, which
+    splits the loop-carried dependency into four independent chains.
+    """
+    cdef Py_ssize_t k, i
+    cdef Py_ssize_t n = series.shape[1]
+    cdef double decay2 = decay * decay
+    cdef double decay3 = decay2 * decay
+    cdef double decay4 = decay2 * decay2
+    if n == 0:
+        return
+    for k in range(series.shape[0]):
+        out[k, 0] = series[k, 0]
+        for i in range(1, min(n, 4)):
+            out[k, i] = series[k, i] + out[k, i - 1] * decay
+        for i in range(4, n):
+            out[k, i] = (
+                series[k, i]
+                + decay * series[k, i - 1]
+                + decay2 * series[k, i - 2]
+                + decay3 * series[k, i - 3]
+                + decay4 * out[k, i - 4]
+            )
@@ -1,35 +1,293 @@
+import functools
+from pathlib import Path
+
 import numpy as np
 from numpy.typing import NDArray
 
-def _apply_halflife(series: NDArray[np.float64], halflife: np.float32, rounding: int=4) -> NDArray[np.float32]:
+# Replaced by numba.prange when numba is loaded, see `_numba_kernel`.
+prange = range
+
+try:
+    from ._adstock import adstock_f32 as _adstock_f32
+except ImportError:
+    _adstock_f32 = None
+
+# Largest value of -log(decay ** k) a single block of the closed form may
+# span. float32 overflows near exp(88), the margin leaves room for the
+# magnitude of the input itself once scaled by 1 / decay ** k.
+_MAX_LOG_SCALE = 40.0
+
+# Closed-form blocks shorter than this spend most of their time in the
+# Python loop over blocks; an FFT convolution is used instead.
+_MIN_CLOSED_FORM_BLOCK = 128
+
+# The convolution kernel is truncated once decay ** k drops below this.
+_FIR_TOLERANCE = 1e-16
+
+def _adstock_recurrence(series: NDArray[np.float64], decay: float, out: NDArray[np.float32]) -> NDArray[np.float32]:
+    """
+    Evaluate x'_t = x_t + x'_{t-1} * decay along each row with an explicit loop into `out`.
+
+    Compiled through numba by `_numba_kernel`, which processes the
+    independent rows in parallel; called uncompiled it gives the same
+    result, only slowly.
+
+    After the first four periods the recurrence is unrolled to
+    x'_t = x_t + d x_{t-1} + d^2 x_{t-2} + d^3 x_{t-3} + d^4 x'_{t-4}, which
+    splits the loop-carried dependency into four independent chains.
+    """
+    n = series.shape[1]
+    if n == 0:
+        return out
+    decay2 = decay * decay
+    decay3 = decay2 * decay
+    decay4 = decay2 * decay2
+    for k in prange(series.shape[0]):
+        out[k, 0] = series[k, 0]
+        for i in range(1, min(n, 4)):
+            out[k, i] = series[k, i] + out[k, i - 1] * decay
+        for i in range(4, n):
+            out[k, i] = (
+                series[k, i]
+                + decay * series[k, i - 1]
+                + decay2 * series[k, i - 2]
+                + decay3 * series[k, i - 3]
+                + decay4 * out[k, i - 4]
+            )
+    return out
+
+@functools.cache
+def _numba_kernel():
+    """
+    Return the numba-compiled `_adstock_recurrence`, or None when numba is not installed.
+
+    numba is imported on first use only, as importing it costs more than a
+    single-series call served by the Cython extension.
+    """
+    global prange
+    try:
+        import numba
+    except ImportError:
+        return None
+    prange = numba.prange
+    return numba.njit(parallel=True, fastmath=True, cache=True)(_adstock_recurrence)
+
+@functools.lru_cache(maxsize=32)
+def _weights(n: int, decay: float, dtype: str) -> NDArray[np.floating]:
+    """
+    Return the read-only weights [1, decay, decay^2, ..., decay^(n-1)] as `dtype`.
+
+    Cached, since the weights depend only on the length and decay rate of a
+    call and not on the data.
+    """
+    # A float64 running product needs only multiplies, no transcendental
+    # per element, and stays accurate to ~n * 1e-16 before the single cast
+    # to `dtype`. The closed form only runs when neither compiled kernel is
+    # available, so a compiled weight builder would never be used.
+    weights = np.empty(n, dtype=np.float64)
+    weights[:1] = 1.0
+    weights[1:] = decay
+    np.cumprod(weights, out=weights)
+    weights = weights.astype(dtype, copy=False)
+    weights.flags.writeable = False
+    return weights
+
+def _closed_form_block(n: int, decay: float) -> int:
+    """
+    Return the number of periods one block of the closed form can cover.
+    """
+    with np.errstate(divide="ignore"):
+        log_decay = np.log(decay)
+    if log_decay * n >= -_MAX_LOG_SCALE:
+        return n
+    return max(1, int(-_MAX_LOG_SCALE / log_decay))
+
+def _adstock_fft(series: NDArray[np.float64], decay: float, out: NDArray[np.float32]) -> NDArray[np.float32]:
+    """
+    Evaluate the adstock recurrence as a convolution with [1, decay, decay^2, ...] along each row into `out`.
+
+    The kernel is truncated where its weights become negligible and the
+    convolution is done with FFTs, which suits long series with a short
+    half-life.
+    """
+    from scipy.signal import oaconvolve
+
+    n = series.shape[1]
+    if n == 0:
+        return out
+    with np.errstate(divide="ignore"):
+        length = int(np.ceil(np.log(_FIR_TOLERANCE) / np.log(decay)))
+    kernel = _weights(min(n, max(1, length)), float(decay), "float64")
+    out[...] = oaconvolve(series, kernel[np.newaxis], mode="full", axes=1)[:, :n]
+    return out
+
+def _adstock_closed_form(series: NDArray[np.float64], decay: float, out: NDArray[np.float32]) -> NDArray[np.float32]:
+    """
+    Evaluate the adstock recurrence as x'_t = decay^t * cumsum(x_k / decay^k) along each row into `out`.
+
+    Long series are split into blocks, carrying the last value across, so
+    the weights never underflow.
+    """
+    n = series.shape[1]
+    if n == 0:
+        return out
+
+    block = _closed_form_block(n, decay)
+    weights = _weights(block, float(decay), "float32")
+
+    # (cumsum(x / w) + carry * decay) * w, evaluated in place in `out`;
+    # w[0] == 1 so the carried value is folded into the first column.
+    carry = np.zeros(series.shape[0], dtype=np.float32)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        w = weights[:stop - start]
+        chunk = out[:, start:stop]
+        np.divide(series[:, start:stop], w, out=chunk, casting="same_kind")
+        chunk[:, 0] += carry * decay
+        np.cumsum(chunk, axis=1, out=chunk)
+        np.multiply(chunk, w, out=chunk)
+        carry = chunk[:, -1]
+    return out
+
+def _round_inplace(values: NDArray[np.float32], rounding: int) -> NDArray[np.float32]:
+    """
+    Round `values` to `rounding` decimals in place, matching np.round.
+
+    Scales, rounds half to even and scales back on the same buffer instead
+    of letting np.round allocate a temporary.
+    """
+    if rounding != 0:
+        scale = np.float32(10.0 ** rounding)
+        np.multiply(values, scale, out=values)
+    np.rint(values, out=values)
+    if rounding != 0:
+        np.divide(values, scale, out=values)
+    return values
+
+def _apply_halflife_batch(
+    series: NDArray[np.float64],
+    halflife: np.float32,
+    rounding: int=4,
+    out: NDArray[np.float32] | None=None,
+    out_path: Path | None=None,
+) -> NDArray[np.float32]:
+    """
+    Apply exponential decay to every row of a 2-D array of series based on the given half-life.
+
+    Each row, e.g. one media channel, is transformed independently along
+    the last axis with the same decay rate, in a single call.
+
+    Parameters:
+    - series: NDArray[np.float64]
+        The input time series data, one series per row.
+    - halflife: np.float64
+        The half-life period for the exponential decay.
+    - rounding: int
+        Number of decimal places to round the result to.
+    - out: NDArray[np.float32] | None
+        Optional preallocated float32 buffer of the same shape as `series`
+        to write the result into. A new array is allocated if omitted; the
+        input series is never modified.
+    - out_path: Path | None
+        Optional file to write the result into instead, through a float32
+        np.memmap of the same shape as `series`, so that large batches are
+        paged by the OS rather than held in memory. Cannot be combined
+        with `out`.
+
+    Returns:
+    - NDArray[np.float32]
+        The transformed series with exponential decay applied, as the
+        np.memmap when `out_path` is given.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    if series.ndim != 2:
+        raise ValueError(f"series must be a 2-D array, got {series.ndim} dimensions")
+    if out is not None and out_path is not None:
+        raise ValueError("out and out_path cannot be used together")
+    if out_path is not None:
+        out = np.memmap(out_path, dtype=np.float32, mode="w+", shape=series.shape)
+    elif out is None:
+        out = np.empty(series.shape, dtype=np.float32)
+    elif out.shape != series.shape or out.dtype != np.float32:
+        raise ValueError(
+            f"out must be a float32 array of shape {series.shape}, got {out.dtype} array of shape {out.shape}"
+        )
+
+    decay = 0.5 ** (1.0 / float(halflife))
+    # The Cython extension needs no JIT warm-up, so numba is only loaded
+    # for a multi-row batch, which it runs in parallel, or when the
+    # extension cannot be used.
+    use_extension = _adstock_f32 is not None and out.flags.c_contiguous
+    numba_kernel = _numba_kernel() if series.shape[0] > 1 or not use_extension else None
+    if numba_kernel is not None:
+        # Contiguous rows keep each thread on its own stretch of memory.
+        numba_kernel(np.ascontiguousarray(series), decay, out)
+    elif use_extension:
+        _adstock_f32(np.ascontiguousarray(series), decay, out)
+    elif (
+        _closed_form_block(series.shape[1], decay) < min(series.shape[1], _MIN_CLOSED_FORM_BLOCK)
+        # A non-finite value would leak into earlier periods through the FFT.
+        and np.isfinite(series).all()
+    ):
+        _adstock_fft(series, decay, out)
+    else:
+        _adstock_closed_form(series, decay, out)
+    _round_inplace(out, rounding)
+    if out_path is not None:
+        out.flush()
+    return out
+
+def _apply_halflife(
+    series: NDArray[np.float64],
+    halflife: np.float32,
+    rounding: int=4,
+    out: NDArray[np.float32] | None=None,
+) -> NDArray[np.float32]:
     """
     Apply exponential decay to a pandas Series based on the given half-life.
 
+    The recurrence x'_t = x_t + x'_{t-1} * r uses the loop-invariant decay
+    rate r = exp(ln(0.5) / halflife) = 0.5 ** (1 / halflife), computed once
+    per call. The result is accumulated directly in a float32 buffer, the
+    output precision, without copying the input. It runs through the
+    compiled Cython extension or a numba-compiled loop when either is
+    available and falls back to the vectorised closed form, or an FFT
+    convolution for long series with a short half-life, otherwise, see
+    `_apply_halflife_batch`.
+
     Parameters:
     - series: NDArray[np.float64]
         The input time series data.
     - halflife: np.float64
         The half-life period for the exponential decay.
+    - rounding: int
+        Number of decimal places to round the result to.
+    - out: NDArray[np.float32] | None
+        Optional preallocated float32 buffer of the same shape as `series`
+        to write the result into. A new array is allocated if omitted; the
+        input series is never modified.
 
     Returns:
     - NDArray[np.float32]
         The transformed series with exponential decay applied.
     """
-    adstocked_series = series.copy()
-
-    # TODO: Enter your calculation here
-    # Implement the exponential decay logic
-    # Hint: Use the formula mentioned in the background section
-
-    return np.round(adstocked_series, rounding).astype(np.float32)
+    series = np.asarray(series, dtype=np.float64)
+    if series.ndim != 1:
+        raise ValueError(
+            f"series must be a 1-D array, got {series.ndim} dimensions; "
+            "use _apply_halflife_batch for 2-D input"
+        )
+    result = _apply_halflife_batch(
+        series[np.newaxis], halflife, rounding, None if out is None else out[np.newaxis]
+    )
+    return result[0] if out is None else out
 
 if __name__ == "__main__":
     import pandas as pd
-    from pathlib import Path
 
     # Example usage
     data_path = Path(__file__).parent.parent.parent / "data" / "raw" / "raw_data.csv"
-    example_series = pd.read_csv(data_path, parse_dates=["date_week"])["tv_ad_executions"].values
+    example_series = pd.read_csv(data_path, usecols=["tv_ad_executions"])["tv_ad_executions"].to_numpy()
     halflife = 2.5
     transformed_series = _apply_halflife(example_series, halflife)
-    print(transformed_series)
\ No newline at end of file
+    print(transformed_series)
@@ -1,10 +1,43 @@
-import pandas as pd
+import os
+import tempfile
+import numpy as np
 from pathlib import Path
 from app.utils.transformations import _apply_halflife
 
+def _load_series(path: Path) -> np.ndarray:
+    """
+    Load the tv_ad_executions column of the raw CSV as a float64 array.
+
+    The column is read with np.genfromtxt rather than pandas, which keeps the
+    import and parsing cost of the CLI low. The parsed column is cached in
+    a .npy file next to the CSV and memory mapped on later runs, unless
+    the CSV has changed since.
+    """
+    cache_path = path.with_suffix(".tv.npy")
+    if cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime:
+        return np.load(cache_path, mmap_mode="r")
+
+    with path.open() as f:
+        column = f.readline().strip().split(",").index("tv_ad_executions")
+    # genfromtxt maps blank cells to NaN, as pandas did.
+    series = np.atleast_1d(np.genfromtxt(path, delimiter=",", skip_header=1, usecols=column, dtype=np.float64))
+    # Write the cache atomically so a concurrent run never maps a partial
+    # file, and carry on without it where the data directory is read-only.
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npy")
+    except OSError:
+        return series
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, series)
+        os.replace(tmp_name, cache_path)
+    except OSError:
+        Path(tmp_name).unlink(missing_ok=True)
+    return series
+
 def main():
     data_path = Path(__file__).parent / "data" / "raw" / "raw_data.csv"
-    example_series = pd.read_csv(data_path, parse_dates=["date_week"])["tv_ad_executions"].values
+    example_series = _load_series(data_path)
     halflife = 2.5
     transformed_series = _apply_halflife(example_series, halflife)
     print(transformed_series)
@@ -0,0 +1,36 @@
+from Cython.Build import cythonize
+from setuptools import Extension, find_packages, setup
+from setuptools.command.build_ext import build_ext
+from setuptools.errors import CCompilerError, ExecError, PlatformError
+
+_BUILD_ERRORS = (CCompilerError, ExecError, PlatformError, OSError)
+
+
+class OptionalBuildExt(build_ext):
+    """
+    Build the compiled adstock kernel if possible.
+
+    The kernel is optional: when it cannot be built, e.g. without a C
+    compiler, the install continues and the pure Python paths are used.
+    """
+
+    def run(self):
+        try:
+            super().run()
+        except _BUILD_ERRORS as exc:
+            self.warn(f"skipping the compiled adstock kernel: {exc}")
+
+    def build_extension(self, ext):
+        try:
+            super().build_extension(ext)
+        except _BUILD_ERRORS as exc:
+            self.warn(f"skipping {ext.name}: {exc}")
+
+
+setup(
+    packages=find_packages(include=["app", "app.*"]),
+    ext_modules=cythonize(
+        [Extension("app.utils._adstock", ["app/utils/_adstock.pyx"], extra_compile_args=["-O3"])]
+    ),
+    cmdclass={"build_ext": OptionalBuildExt},
+)
@@ -0,0 +1,46 @@
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from main import _load_series
+
+
+class TestLoadSeries:
+    """Test suite for the _load_series CSV loader."""
+
+    def test_blank_cell_is_nan(self, tmp_path):
+        """Test that a missing value is read as NaN rather than failing."""
+        csv_path = tmp_path / "raw_data.csv"
+        csv_path.write_text("date_week,tv_ad_executions\n2020-01-06,10\n2020-01-13,\n2020-01-20,5\n")
+
+        result = _load_series(csv_path)
+
+        assert result.dtype == np.float64
+        assert_array_equal(result, [10.0, np.nan, 5.0])
+
+    def test_cache_is_reused(self, tmp_path):
+        """Test that the parsed column is cached and memory mapped on the next call."""
+        csv_path = tmp_path / "raw_data.csv"
+        csv_path.write_text("date_week,tv_ad_executions\n2020-01-06,10\n2020-01-13,0\n")
+
+        first = _load_series(csv_path)
+        second = _load_series(csv_path)
+
+        assert isinstance(second, np.memmap)
+        assert_array_equal(first, second)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["raw_data.csv", "raw_data.tv.npy"]
+
+    def test_unwritable_cache_is_skipped(self, tmp_path, monkeypatch):
+        """Test that a failing cache write still returns the parsed series."""
+        csv_path = tmp_path / "raw_data.csv"
+        csv_path.write_text("date_week,tv_ad_executions\n2020-01-06,10\n2020-01-13,0\n")
+
+        def fail(*args, **kwargs):
+            raise OSError("read-only file system")
+
+        monkeypatch.setattr(tempfile, "mkstemp", fail)
+        result = _load_series(csv_path)
+
+        assert_array_equal(result, [10.0, 0.0])
+        assert [p.name for p in tmp_path.iterdir()] == ["raw_data.csv"]
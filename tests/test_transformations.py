@@ -1,8 +1,45 @@
+from pathlib import Path
+
 import numpy as np
 import pytest
 from numpy.testing import assert_array_almost_equal, assert_array_equal
 
-from app.utils.transformations import _apply_halflife
+from app.utils.transformations import (
+    _adstock_closed_form,
+    _adstock_fft,
+    _apply_halflife,
+    _apply_halflife_batch,
+    _weights,
+)
+
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+def plain_recurrence(series, decay):
+    """Reference adstock: y[i] += y[i - 1] * decay along the last axis, in float64."""
+    result = np.array(series, dtype=np.float64)
+    for i in range(1, result.shape[-1]):
+        result[..., i] += result[..., i - 1] * decay
+    return result
+
+
+def exponential_series(shape, seed=42):
+    """Return reproducible TV-ad-like execution counts of the given shape."""
+    return np.random.RandomState(seed).exponential(scale=100, size=shape).astype(np.float64)
+
+
+@pytest.fixture(scope="module")
+def raw_and_processed():
+    """Load the raw series and the expected processed series once per module."""
+    import pandas as pd
+
+    raw_df = pd.read_csv(DATA_DIR / "raw" / "raw_data.csv", parse_dates=["date_week"])
+    processed_df = pd.read_csv(DATA_DIR / "processed" / "processed_data.csv", parse_dates=["date_week"])
+    return (
+        raw_df["tv_ad_executions"].to_numpy(dtype=np.float64),
+        processed_df["tv_ad_executions_adstock"].to_numpy(dtype=np.float32),
+    )
 
 
 class TestApplyHalflife:
@@ -18,9 +55,9 @@ class TestApplyHalflife:
         # Check that result is returned as float32
         assert result.dtype == np.float32
         # Check that the first element remains unchanged
-        assert result[0] == 1.0
+        assert_array_equal(result[:1], series[:1])
         # Check that subsequent elements are affected by adstock
-        assert result[1] > 2.0  # Should be > original due to adstock effect
+        assert np.all(result[1:] > series[1:])  # Should be > original due to adstock effect
         
     def test_zero_series(self):
         """Test with all zeros input."""
@@ -64,8 +101,7 @@ class TestApplyHalflife:
         
         # With longer halflife, the adstock effect should be stronger
         # (values should decay more slowly)
-        assert result_long[1] > result_short[1]
-        assert result_long[2] > result_short[2]
+        assert np.all(result_long[1:] > result_short[1:])
         
     def test_rounding_parameter(self):
         """Test the rounding parameter functionality."""
@@ -85,6 +121,18 @@ class TestApplyHalflife:
         assert isinstance(result_2_decimals[0], np.float32)
         assert isinstance(result_4_decimals[0], np.float32)
         
+    @pytest.mark.parametrize("rounding", [0, 2, 4])
+    def test_rounding_matches_np_round(self, rounding):
+        """Test that in-place rounding gives the same values as np.round."""
+        series = np.array([1.123456789, 2.987654321, 0.5, 7.25, 3.3, 0.0], dtype=np.float64)
+        halflife = 2.0
+        decay = 0.5 ** (1.0 / halflife)
+
+        result = _apply_halflife(series, halflife, rounding=rounding)
+        expected = np.round(plain_recurrence(series, decay).astype(np.float32), rounding)
+
+        assert_array_almost_equal(result, expected, decimal=5)
+        
     def test_mathematical_correctness(self):
         """Test the mathematical correctness of the adstock calculation."""
         series = np.array([10.0, 0.0, 0.0], dtype=np.float64)
@@ -92,13 +140,15 @@ class TestApplyHalflife:
         
         result = _apply_halflife(series, halflife)
         
-        # Calculate expected values manually
-        decay_factor = np.log(0.5) / halflife
+        # Calculate expected values manually; exp(log(0.5) / halflife) is
+        # the same constant as 0.5 ** (1 / halflife) used by the function
+        decay = 0.5 ** (1.0 / halflife)
+        assert np.exp(np.log(0.5) / halflife) == pytest.approx(decay)
         expected = np.array([10.0, 0.0, 0.0], dtype=np.float64)
         
         # Apply the same logic as in the function
         for i in range(1, len(expected)):
-            expected[i] += expected[i - 1] * np.exp(decay_factor)
+            expected[i] += expected[i - 1] * decay
             
         expected_rounded = np.round(expected, 4).astype(np.float32)
         
@@ -115,6 +165,30 @@ class TestApplyHalflife:
         # Original series should remain unchanged
         assert_array_equal(original_series, series_copy)
         
+    def test_out_buffer(self):
+        """Test that the result is written into a provided output buffer."""
+        series = np.array([10.0, 0.0, 0.0], dtype=np.float64)
+        out = np.full(series.shape, np.nan, dtype=np.float32)
+
+        result = _apply_halflife(series, 2.0, out=out)
+
+        assert result is out
+        assert_array_equal(result, _apply_halflife(series, 2.0))
+
+    def test_out_buffer_validation(self):
+        """Test that an output buffer of the wrong shape or dtype is rejected."""
+        series = np.array([1.0, 2.0, 3.0], dtype=np.float64)
+
+        with pytest.raises(ValueError):
+            _apply_halflife(series, 2.0, out=np.empty(2, dtype=np.float32))
+        with pytest.raises(ValueError):
+            _apply_halflife(series, 2.0, out=np.empty(3, dtype=np.float64))
+        
+    def test_rejects_two_dimensional_input(self):
+        """Test that a 2-D array is redirected to _apply_halflife_batch."""
+        with pytest.raises(ValueError, match="_apply_halflife_batch"):
+            _apply_halflife(np.ones((2, 3)), 2.0)
+
     def test_negative_values(self):
         """Test with negative values in the series."""
         series = np.array([-1.0, 2.0, -3.0, 4.0], dtype=np.float64)
@@ -147,7 +221,7 @@ class TestApplyHalflife:
         
         assert result.dtype == np.float32
         assert len(result) == len(series)
-        assert result[0] == 1.0  # First element should always remain the same
+        assert_array_equal(result[:1], series[:1])  # First element should always remain the same
         
     def test_type_annotations_compatibility(self):
         """Test that the function works with the expected numpy types."""
@@ -160,24 +234,121 @@ class TestApplyHalflife:
         assert isinstance(result, np.ndarray)
         assert result.dtype == np.float32
 
+    @pytest.mark.parametrize("halflife,size", [(2.5, 200), (2.5, 3000), (0.05, 5000)])
+    def test_closed_form_matches_recurrence(self, halflife, size):
+        """Test that the float32 closed form agrees with a float64 recurrence."""
+        series = exponential_series((3, size), seed=0)
+        decay = 0.5 ** (1.0 / halflife)
+
+        result = _adstock_closed_form(series, np.float32(decay), np.empty(series.shape, dtype=np.float32))
+        expected = plain_recurrence(series, decay)
+
+        assert result.dtype == np.float32
+        assert_array_almost_equal(result, expected, decimal=3)
+
+    @pytest.mark.parametrize("halflife,size", [(2.5, 200), (0.05, 5000)])
+    def test_fft_matches_recurrence(self, halflife, size):
+        """Test that the truncated FFT convolution agrees with the plain recurrence."""
+        series = exponential_series((3, size), seed=0)
+        decay = 0.5 ** (1.0 / halflife)
+
+        result = _adstock_fft(series, np.float32(decay), np.empty(series.shape, dtype=np.float32))
+        expected = plain_recurrence(series, decay)
+
+        assert_array_almost_equal(result, expected, decimal=4)
+
+    def test_weights_are_cached_and_read_only(self):
+        """Test that the decay weights are memoised and cannot be modified."""
+        decay = 0.5 ** (1.0 / 2.5)
+
+        weights = _weights(10, decay, "float32")
+
+        assert weights is _weights(10, decay, "float32")
+        assert weights.dtype == np.float32
+        assert not weights.flags.writeable
+        assert_array_almost_equal(weights, decay ** np.arange(10), decimal=6)
+        assert_array_equal(_weights(3, 0.0, "float64"), [1.0, 0.0, 0.0])
+
+
+class TestApplyHalflifeBatch:
+    """Test suite for the _apply_halflife_batch function."""
+
+    def test_rows_match_single_series(self):
+        """Test that each row of the batch equals the per-series result."""
+        series = exponential_series((5, 52))
+        halflife = 2.5
+
+        result = _apply_halflife_batch(series, halflife)
+
+        assert result.dtype == np.float32
+        assert result.shape == series.shape
+        for row, expected_row in zip(series, result):
+            assert_array_almost_equal(_apply_halflife(row, halflife), expected_row, decimal=3)
+
+    def test_closed_form_fallback(self, monkeypatch):
+        """Test that the batch result is unchanged when numba is unavailable."""
+        from app.utils import transformations
+
+        series = exponential_series((5, 52))
+        expected = _apply_halflife_batch(series, 2.5)
+
+        monkeypatch.setattr(transformations, "_numba_kernel", lambda: None)
+        result = _apply_halflife_batch(series, 2.5)
+
+        assert_array_almost_equal(result, expected, decimal=3)
+
+    def test_extension_matches_recurrence(self):
+        """Test the compiled Cython kernel against the plain recurrence."""
+        extension = pytest.importorskip("app.utils._adstock")
+
+        series = exponential_series((3, 52))
+        decay = 0.5 ** (1.0 / 2.5)
+        result = np.empty(series.shape, dtype=np.float32)
+
+        extension.adstock_f32(series, decay, result)
+        expected = plain_recurrence(series, decay)
+
+        assert_array_almost_equal(result, expected, decimal=3)
+
+    def test_out_path_memmap(self, tmp_path):
+        """Test that the batch result can be written through a memory-mapped file."""
+        series = exponential_series((5, 52))
+        out_path = tmp_path / "adstock.f32"
+
+        result = _apply_halflife_batch(series, 2.5, out_path=out_path)
+
+        assert isinstance(result, np.memmap)
+        assert_array_equal(result, _apply_halflife_batch(series, 2.5))
+        assert_array_equal(np.fromfile(out_path, dtype=np.float32).reshape(series.shape), result)
+        with pytest.raises(ValueError):
+            _apply_halflife_batch(series, 2.5, out=np.empty(series.shape, dtype=np.float32), out_path=out_path)
+
+    def test_non_finite_values_propagate_forward_only(self, monkeypatch):
+        """Test that a NaN only affects later periods on the pure NumPy path."""
+        from app.utils import transformations
+
+        monkeypatch.setattr(transformations, "_numba_kernel", lambda: None)
+        monkeypatch.setattr(transformations, "_adstock_f32", None)
+        series = np.ones((1, 300), dtype=np.float64)
+        series[0, 1] = np.nan
+
+        result = _apply_halflife_batch(series, 1.0)
+
+        assert_array_equal(result[:, :1], series[:, :1])
+        assert np.all(np.isnan(result[:, 1:]))
+
+    def test_rejects_one_dimensional_input(self):
+        """Test that a single series must go through _apply_halflife."""
+        with pytest.raises(ValueError):
+            _apply_halflife_batch(np.array([1.0, 2.0, 3.0]), 2.0)
+
 
 class TestIntegrationScenarios:
     """Integration tests for realistic usage scenarios."""
     
-    def test_actual_data_transformation(self):
+    def test_actual_data_transformation(self, raw_and_processed):
         """Test transformation with actual raw data against expected processed results."""
-        import pandas as pd
-        from pathlib import Path
-        
-        # Load raw data
-        raw_data_path = Path(__file__).parent.parent / "data" / "raw" / "raw_data.csv"
-        raw_df = pd.read_csv(raw_data_path, parse_dates=["date_week"])
-        raw_series = raw_df["tv_ad_executions"].values.astype(np.float64)
-        
-        # Load expected processed data
-        processed_data_path = Path(__file__).parent.parent / "data" / "processed" / "processed_data.csv"
-        processed_df = pd.read_csv(processed_data_path, parse_dates=["date_week"])
-        expected_series = processed_df["tv_ad_executions_adstock"].values.astype(np.float32)
+        raw_series, expected_series = raw_and_processed
         
         # Apply transformation with the same parameters used in the original
         halflife = 2.5
@@ -192,10 +363,6 @@ class TestIntegrationScenarios:
         # Allow for small floating-point differences
         assert_array_almost_equal(result, expected_series, decimal=3)
         
-        # Verify specific data points to ensure correctness
-        assert abs(result[0] - expected_series[0]) < 0.01  # First value should be nearly identical
-        assert result[0] == pytest.approx(expected_series[0], rel=1e-3)
-        
         # Check that adstock effect is working (later values should be influenced by earlier ones)
         assert np.sum(result) >= np.sum(raw_series)  # Adstock should increase cumulative effect
     
@@ -232,7 +399,7 @@ class TestIntegrationScenarios:
         assert result.dtype == np.float32
         assert len(result) == weeks
         # Values after high-spending periods should show carryover effect
-        assert result[45] > series[45]  # Should benefit from previous weeks
+        assert np.all(result[1:] > series[1:])  # Should benefit from previous weeks
 
 
 if __name__ == "__main__":